@@ -11,19 +11,262 @@ ID and returns it to CloudFormation.
 """
 
 from datetime import datetime, date
+from functools import lru_cache
+from http.client import HTTPException
 import json
-from types import MethodType
-from typing import Any, Callable, Dict, Optional
+import logging
+import os
+import random
+import string
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 
 
-# From requirements.txt:
-import boto3
-from crhelper import CfnResource
-from jmespath import search
-from flatdict import FlatterDict
+# Optional: faster JSON encoder for the responses, if provided (e.g. by a Lambda layer).
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
 
 
-cfn_resource = CfnResource()
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Cast functions of the supported type strings, applied to the value of the type string key.
+TYPE_MAPPERS: Dict[str, Callable[[str], Any]] = {
+    'Type::Int': int,
+    'Type::Float': float,
+    'Type::Bool': lambda v: v.lower() in ('true', '1')
+}
+
+
+@lru_cache(maxsize=None)
+def _get_session():
+    """
+    Get the Boto3 session shared by all clients, creating it on first use only.
+
+    Boto3 is imported lazily, and the session is cached for the lifetime of the execution environment, so that its
+    credentials are resolved once rather than for every client.
+
+    :return: The Boto3 session.
+
+    :rtype: boto3.session.Session
+    """
+    import boto3  # pylint: disable=import-outside-toplevel
+
+    return boto3.session.Session()
+
+
+@lru_cache(maxsize=None)
+def _get_client(client_name: str):
+    """
+    Get a Boto3 client for the given service, creating it on first use only.
+
+    Clients are cached for the lifetime of the execution environment, so that warm invocations skip both the service
+    model loading and the endpoint resolution of the client construction.
+
+    :param client_name: The name of the AWS service to get a Boto3 client for (e.g. 's3', 'ec2').
+
+    :type client_name: str
+
+    :return: The Boto3 client for the given service.
+
+    :rtype: botocore.client.BaseClient
+    """
+    from botocore.config import Config  # pylint: disable=import-outside-toplevel
+
+    # Use the standard retry mode, which bounds throttled or transient failures to 3 attempts (rather than the legacy
+    # mode's 5), so that a failing call does not eat into the function timeout.
+    return _get_session().client(client_name, config=Config(retries={'mode': 'standard'}))  # type: ignore
+
+
+@lru_cache(maxsize=128)
+def _compile_jmes(expression: str):
+    """
+    Compile the given JMESPath expression, parsing it on first use only.
+
+    :param expression: The JMESPath expression to compile.
+
+    :type expression: str
+
+    :return: The compiled JMESPath expression.
+
+    :rtype: jmespath.parser.ParsedResult
+    """
+    import jmespath  # pylint: disable=import-outside-toplevel
+
+    return jmespath.compile(expression)
+
+
+def _flatten(obj: Any) -> Iterator[Tuple[str, Any]]:
+    """
+    Flatten the given Boto3 response into (key, value) pairs, with nested keys joined by dots.
+
+    Dictionary keys and list indexes are joined with their parent key (e.g. 'Reservations.0.Instances.0.InstanceId'),
+    and empty dictionaries or lists are kept as is. Datetimes are escaped to ISO 8601 strings along the way, as Boto3
+    returns JSON unserializable datetimes. Responses that are not dictionaries are flattened under a 'Result' key.
+
+    :param obj: The Boto3 response to flatten. This can be of any type.
+
+    :type obj: Any
+
+    :return: An iterator over the flattened (key, value) pairs of the given response.
+
+    :rtype: Iterator[Tuple[str, Any]]
+    """
+    # Boto3 methods almost always return dictionaries: try to walk them first.
+    try:
+        root = obj.items()
+    except AttributeError:
+        root = {'Result': obj}.items()
+
+    # Walk the response using an explicit stack of (key, value) tuples. Children are pushed in reverse order so that
+    # pairs are yielded in the same order as the keys of the original response.
+    stack: List[Tuple[str, Any]] = [(str(k), v) for k, v in reversed(root)]
+
+    while stack:
+        key, value = stack.pop()
+
+        if isinstance(value, (dict, list)) and value:
+            items = value.items() if isinstance(value, dict) else enumerate(value)
+            stack.extend(reversed([('%s.%s' % (key, k), v) for k, v in items]))
+
+        else:
+            # Boto3 only returns plain datetimes and dates, which can be matched by type identity, skipping the
+            # subclass checks of isinstance on every other value.
+            yield key, value.isoformat() if type(value) in (datetime, date) else value
+
+
+def _generate_physical_id(event: Dict[str, Any]) -> str:
+    """
+    Generate a unique physical resource ID for the custom resource.
+
+    :param event: The CloudFormation custom resource event.
+
+    :type event: Dict[str, Any]
+
+    :return: A physical resource ID made of the stack name, the resource logical ID and a random suffix.
+
+    :rtype: str
+    """
+    return '_'.join([
+        event['StackId'].split('/')[1],
+        event['LogicalResourceId'],
+        ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+    ])
+
+
+def _send_response(event: Dict[str, Any], deadline: float, status: str, physical_id: str,
+                   data: Optional[Dict[str, Any]] = None, reason: str = '') -> None:
+    """
+    Send the custom resource response to CloudFormation, by uploading it to the pre-signed S3 URL of the event.
+
+    :param event: The CloudFormation custom resource event.
+
+    :type event: Dict[str, Any]
+
+    :param deadline: The time.monotonic() value by which to give up sending the response, as the function would
+                     otherwise time out.
+
+    :type deadline: float
+
+    :param status: The status of the custom resource request, either 'SUCCESS' or 'FAILED'.
+
+    :type status: str
+
+    :param physical_id: The physical resource ID of the custom resource.
+
+    :type physical_id: str
+
+    :param data: The custom resource attributes, accessible in CloudFormation via Fn::GetAtt.
+
+    :type data: Optional[Dict[str, Any]]
+
+    :param reason: The reason of a failure, shown in the CloudFormation stack events.
+
+    :type reason: str
+    """
+    response: Dict[str, Any] = {
+        'Status': status,
+        # CloudFormation truncates reasons to 256 characters; keep the end of it, which is usually the most relevant.
+        'Reason': reason if len(reason) <= 256 else 'ERROR: (truncated) %s' % reason[-240:],
+        'PhysicalResourceId': physical_id,
+        'StackId': event['StackId'],
+        'RequestId': event['RequestId'],
+        'LogicalResourceId': event['LogicalResourceId'],
+        'NoEcho': False,
+        'Data': data or {}
+    }
+
+    body: Optional[bytes] = None
+
+    # orjson is stricter than json (e.g. on integers over 64 bits): fall back to json rather than failing the request.
+    if orjson:
+        try:
+            body = orjson.dumps(response)
+        except TypeError as err:
+            logger.debug('Failed to serialize the response with orjson, falling back to json: %s', err)
+
+    if body is None:
+        try:
+            body = json.dumps(response).encode()
+
+        except (TypeError, ValueError) as err:
+            logger.error('Failed to serialize the response: %s', err, exc_info=True)
+            response.update({'Status': 'FAILED', 'Reason': 'Failed to serialize the response: %s' % err, 'Data': {}})
+            body = json.dumps(response).encode()
+
+    logger.debug(body)
+
+    # The pre-signed URL is signed without content type, thus the header must be sent empty.
+    request = Request(event['ResponseURL'], data=body, headers={'Content-Type': ''}, method='PUT')
+
+    # Never let a transport error escape, nor the function time out: the invocation would fail, and Lambda would retry
+    # it, calling the Boto3 method again. Errors raised while reading the response are not wrapped in URLError by
+    # urllib, and attempts are bounded by the deadline.
+    for attempt in range(1, 6):
+        if (time_left := deadline - time.monotonic()) <= 0:
+            break
+
+        try:
+            with urlopen(request, timeout=min(time_left, 30)) as res:
+                logger.info('CloudFormation returned status code: %s', res.reason)
+                return
+
+        except HTTPError as err:
+            # The server answered: retrying (e.g. with an expired pre-signed URL) would not change its answer.
+            logger.error('CloudFormation rejected the response with status code %d: %s', err.code, err.reason)
+            return
+
+        except (OSError, HTTPException) as err:
+            logger.error('Failed to send the response to CloudFormation (attempt %d): %s', attempt, err)
+
+        if attempt < 5:
+            time.sleep(max(min(deadline - time.monotonic(), 5), 0))
+
+    logger.error('Giving up sending the response to CloudFormation, the stack will wait for it until it times out.')
+
+
+def _has_markers_or_containers(parameter: Dict[str, Any]) -> bool:
+    """
+    Check whether the given dictionary has a type string key, or a dictionary or list value.
+
+    :param parameter: The dictionary to check.
+
+    :type parameter: Dict[str, Any]
+
+    :return: True if the dictionary may need to be type-casted, False otherwise.
+
+    :rtype: bool
+    """
+    for k, v in parameter.items():
+        if k in TYPE_MAPPERS or isinstance(v, (dict, list)):
+            return True
+
+    return False
 
 
 def handle_param_typing(parameter):
@@ -35,7 +278,7 @@ def handle_param_typing(parameter):
     type, as custom resource parameters are (wrongfully) all mapped to strings.
     @see: https://github.com/aws-cloudformation/cloudformation-coverage-roadmap/issues/1037
 
-    The function takes one argument, parameter, which can be of any type. The function will recursively traverse
+    The function takes one argument, parameter, which can be of any type. The function will traverse nested
     dictionaries and lists and cast any values that match certain type strings. The supported type strings are
     'Type::Int', 'Type::Float', and 'Type::Bool', and the corresponding cast functions are int(), float(), and bool(),
     respectively.
@@ -49,25 +292,40 @@ def handle_param_typing(parameter):
     :rtype: Any
     """
 
-    TYPE_MAPPERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
-        'Type::Int': lambda v: int(v['Type::Int']),
-        'Type::Float': lambda v: float(v['Type::Float']),
-        'Type::Bool': lambda v: v['Type::Bool'].lower() in ('true', '1')
-    }
+    # Most parameters are flat dictionaries of strings: return them as is rather than copying them.
+    if isinstance(parameter, dict) and not _has_markers_or_containers(parameter):
+        return parameter
 
-    return (
-        TYPE_MAPPERS[next(k for k in parameter if k in TYPE_MAPPERS)](parameter) if isinstance(parameter, dict)
-        and any(k in parameter for k in TYPE_MAPPERS)
-        else {k: handle_param_typing(v) for k, v in parameter.items()} if isinstance(parameter, dict)
-        else [handle_param_typing(v) for v in parameter] if isinstance(parameter, list)
-        else parameter
-    )
+    # Traverse the parameter using an explicit stack rather than recursion, so that deeply nested parameters do not
+    # hit the interpreter recursion limit. Each stack item is a (container, key, value) tuple, where the type-casted
+    # value is to be set at container[key]. Containers are shallow-copied once, and only their nested dictionaries and
+    # lists are pushed onto the stack.
+    root: List[Any] = [parameter]
+    stack: List[Tuple[Any, Any, Any]] = [(root, 0, parameter)]
 
+    while stack:
+        container, key, value = stack.pop()
 
-@cfn_resource.create
-@cfn_resource.update
-@cfn_resource.delete
-def handle_custom_resource_request(event: Dict[str, Any], _) -> Optional[str]:
+        if isinstance(value, dict):
+            for type_key, cast in TYPE_MAPPERS.items():
+                if type_key in value:
+                    container[key] = cast(value[type_key])
+                    break
+
+            else:
+                typed_value: Any = dict(value)
+                container[key] = typed_value
+                stack.extend((typed_value, k, v) for k, v in value.items() if isinstance(v, (dict, list)))
+
+        elif isinstance(value, list):
+            typed_value = list(value)
+            container[key] = typed_value
+            stack.extend((typed_value, i, v) for i, v in enumerate(value) if isinstance(v, (dict, list)))
+
+    return root[0]
+
+
+def handle_custom_resource_request(event: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any]]:
     """
     Handle the creation, update, or deletion of the custom CloudFormation resource using the specified Boto3 method.
 
@@ -84,19 +342,18 @@ def handle_custom_resource_request(event: Dict[str, Any], _) -> Optional[str]:
 
     :type event: Dict[str, Any]
 
-    :param _: An object containing information about the currently executing function and runtime environment.
-
-    :type _: object
-
-    :return: If the physical resource ID can be extracted from the resource properties or response, return it.
-             Otherwise, return None, and let crhelper handle the generation of the physical resource ID.
+    :return: A tuple containing the physical resource ID, if it can be extracted from the resource properties or
+             response (otherwise, None, and let the handler reuse or generate one), and the resource attributes.
 
-    :rtype: Optional[str]
+    :rtype: Tuple[Optional[str], Dict[str, Any]]
     """
+    event_request_type: str = event['RequestType']
+    resource_properties: Dict[str, Any] = event['ResourceProperties']
+
     # If no update handler is specified, create a new resource.
     request_type: Optional[str] = (
-        event['RequestType'] if event['RequestType'] in event['ResourceProperties'] else
-        'Create' if event['RequestType'] == 'Update' and 'Create' in event['ResourceProperties']
+        event_request_type if event_request_type in resource_properties else
+        'Create' if event_request_type == 'Update' and 'Create' in resource_properties
         else None
     )
 
@@ -104,37 +361,31 @@ def handle_custom_resource_request(event: Dict[str, Any], _) -> Optional[str]:
     if request_type is None:
         # If both the Create and Update hooks are not supported, we still want to force to Delete operation to trigger
         # by changing the PhysicalResourceId.
-        if event['RequestType'] == 'Update':
-            return cfn_resource.generate_physical_id(event)
+        if event_request_type == 'Update':
+            return _generate_physical_id(event), {}
 
-        return None
+        return None, {}
 
     # Get Boto3 config from resource properties.
-    hook_properties: Dict[str, Any] = event['ResourceProperties'][request_type]
+    hook_properties: Dict[str, Any] = resource_properties[request_type]
     client_name: str = hook_properties['Client']
     method_name: str = hook_properties['Method']
     boto_request_params: Dict[str, Any] = hook_properties.get('Parameters', {})
 
-    client = boto3.client(client_name)  # type: ignore
-    if not (hasattr(client, method_name) and isinstance(getattr(client, method_name), MethodType)):
+    method = getattr(_get_client(client_name), method_name, None)
+    if not callable(method):
         raise ValueError('Boto client method \'%s.%s\' does not exist.' % (client_name, method_name))
 
     # Call Boto3 method.
-    boto_res = getattr(client, method_name)(**handle_param_typing(boto_request_params))
+    boto_res = method(**handle_param_typing(boto_request_params))
     # Set Boto3 method response as Data, this will be accessible in CloudFormation via Fn::GetAtt.
-    # Note: Boto3 return JSON unserializable datetimes, and Cfnhelper does not escape unserializable objects to strings
-    # by default, thus escaping datetimes.
-    cfn_resource.Data = {
-        k: v.strftime('%Y-%m-%dT%H:%M:%S') if isinstance(v, (datetime, date)) else v
-        for k, v in dict(
-            FlatterDict(boto_res if isinstance(boto_res, dict) else {'Result': boto_res}, delimiter='.')
-        ).items()
-    }
+    # Note: Boto3 return JSON unserializable datetimes, thus escaping datetimes.
+    data: Dict[str, Any] = dict(_flatten(boto_res))
 
     # If the resource PhysicalResourceId can be extracted from the resource properties or response, do so.
     if request_type in ('Create', 'Update'):
         if (physical_id_expr := hook_properties.get('PhysicalResourceId')):
-            physical_id = search(physical_id_expr, boto_res)
+            physical_id = _compile_jmes(physical_id_expr).search(boto_res)
 
             # Fail if the JMESPath does not return anything. Dangerous behaviour as some undelying resources may have
             # been created; but a need trade-off to prevent the custom resource to be misreferenced.
@@ -143,10 +394,19 @@ def handle_custom_resource_request(event: Dict[str, Any], _) -> Optional[str]:
                                  'result. Said resource will not be roll-backed and must be deleted manually.'
                                  % request_type.lower())
 
-            cfn_resource.Data['Ref'] = physical_id if isinstance(physical_id, str) else json.dumps(physical_id)
-            return cfn_resource.Data['Ref']
+            data['Ref'] = physical_id if isinstance(physical_id, str) else json.dumps(physical_id)
+            return data['Ref'], data
+
+    return None, data
+
 
-    return None
+# Handlers of the CloudFormation custom resource request types. The same handler serves all of them, and looks up the
+# hook to invoke in the resource properties.
+REQUEST_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Tuple[Optional[str], Dict[str, Any]]]] = {
+    'Create': handle_custom_resource_request,
+    'Update': handle_custom_resource_request,
+    'Delete': handle_custom_resource_request
+}
 
 
 def lambda_handler(event: Dict[str, Any], context):
@@ -170,4 +430,36 @@ def lambda_handler(event: Dict[str, Any], context):
 
     :type context: object
     """
-    cfn_resource(event, context)
+    logger.debug(event)
+
+    # Reuse the physical resource ID of the event if the handler does not return any, or generate one.
+    default_physical_id: str = event.get('PhysicalResourceId') or _generate_physical_id(event)
+
+    # Responses must be sent before the function times out, keeping a margin for the function to return.
+    time_left: float = context.get_remaining_time_in_millis() / 1000
+    deadline: float = time.monotonic() + time_left - 0.2
+
+    # CloudFormation waits for a response for up to an hour: always send one, even if the function is about to time out.
+    timer = threading.Timer(
+        time_left - 1, _send_response,
+        args=(event, deadline, 'FAILED', default_physical_id), kwargs={'reason': 'Execution timed out'}
+    )
+    timer.start()
+
+    try:
+        # Only invoke hooks for the CloudFormation lifecycle request types, not any key of the resource properties.
+        if (handler := REQUEST_HANDLERS.get(event['RequestType'])) is None:
+            raise ValueError('Unsupported request type \'%s\'.' % event['RequestType'])
+
+        physical_id, data = handler(event)
+        status, reason = 'SUCCESS', ''
+
+    except Exception as err:  # pylint: disable=broad-except
+        logger.error(err, exc_info=True)
+        physical_id, data = None, {}
+        status, reason = 'FAILED', str(err)
+
+    finally:
+        timer.cancel()
+
+    _send_response(event, deadline, status, physical_id or default_physical_id, data, reason)
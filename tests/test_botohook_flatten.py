@@ -0,0 +1,70 @@
+import unittest
+from datetime import date, datetime, timezone
+from botohook.lambda_function import _flatten
+
+
+class TestBotohookFlatten(unittest.TestCase):
+    def test_flatten_nested_keys(self):
+        """_flatten() should join nested dictionary keys and list indexes with dots, keeping their order."""
+        input_response = {
+            'Reservations': [
+                {
+                    'Instances': [
+                        {'InstanceId': 'i-0123456789abcdef0', 'State': {'Name': 'running'}}
+                    ]
+                }
+            ],
+            'ResponseMetadata': {'HTTPStatusCode': 200}
+        }
+        expected_output = [
+            ('Reservations.0.Instances.0.InstanceId', 'i-0123456789abcdef0'),
+            ('Reservations.0.Instances.0.State.Name', 'running'),
+            ('ResponseMetadata.HTTPStatusCode', 200)
+        ]
+        output = list(_flatten(input_response))
+        self.assertEqual(output, expected_output)
+
+    def test_flatten_datetimes(self):
+        """_flatten() should escape datetimes and dates to ISO 8601 strings."""
+        input_response = {
+            'CreationDate': datetime(2023, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc),
+            'LastModified': datetime(2023, 1, 2, 3, 4, 5),
+            'ExpirationDate': date(2023, 1, 2)
+        }
+        expected_output = {
+            'CreationDate': '2023-01-02T03:04:05.678000+00:00',
+            'LastModified': '2023-01-02T03:04:05',
+            'ExpirationDate': '2023-01-02'
+        }
+        output = dict(_flatten(input_response))
+        self.assertEqual(output, expected_output)
+
+    def test_flatten_empty_containers(self):
+        """_flatten() should keep empty dictionaries and lists as is."""
+        input_response = {
+            'Tags': [],
+            'Policy': {},
+            'Grants': [{'Permissions': []}]
+        }
+        expected_output = {
+            'Tags': [],
+            'Policy': {},
+            'Grants.0.Permissions': []
+        }
+        output = dict(_flatten(input_response))
+        self.assertEqual(output, expected_output)
+
+    def test_flatten_non_dict_response(self):
+        """_flatten() should flatten responses that are not dictionaries under a 'Result' key."""
+        self.assertEqual(dict(_flatten('https://my-bucket.s3.amazonaws.com/my-key')), {
+            'Result': 'https://my-bucket.s3.amazonaws.com/my-key'
+        })
+        self.assertEqual(dict(_flatten(['a', {'b': 1}])), {
+            'Result.0': 'a',
+            'Result.1.b': 1
+        })
+        self.assertEqual(dict(_flatten(None)), {'Result': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from botohook.lambda_function import handle_param_typing
+
+
+class TestBotohookHandleParamTyping(unittest.TestCase):
+    def test_handle_param_typing_successful_casting(self):
+        """handle_param_typing() should cast any type string, at any depth of the parameter."""
+        input_parameter = {
+            'MinCount': {'Type::Int': '1'},
+            'Placement': {
+                'Ratio': {'Type::Float': '0.8'}
+            },
+            'BlockDeviceMappings': [
+                {
+                    'DeviceName': '/dev/sda1',
+                    'Ebs': {
+                        'DeleteOnTermination': {'Type::Bool': 'True'},
+                        'Encrypted': {'Type::Bool': 'false'}
+                    }
+                }
+            ],
+            'ImageId': 'ami-0c55b159cbfafe1f0'
+        }
+        expected_output = {
+            'MinCount': 1,
+            'Placement': {
+                'Ratio': 0.8
+            },
+            'BlockDeviceMappings': [
+                {
+                    'DeviceName': '/dev/sda1',
+                    'Ebs': {
+                        'DeleteOnTermination': True,
+                        'Encrypted': False
+                    }
+                }
+            ],
+            'ImageId': 'ami-0c55b159cbfafe1f0'
+        }
+        output = handle_param_typing(input_parameter)
+        self.assertEqual(output, expected_output)
+
+    def test_handle_param_typing_ignored_casting(self):
+        """handle_param_typing() should leave parameters without type strings unchanged."""
+        input_parameter = {
+            'Bucket': 'my-bucket',
+            'Tags': [{'Key': 'Type', 'Value': 'Type::Int'}]
+        }
+        expected_output = {
+            'Bucket': 'my-bucket',
+            'Tags': [{'Key': 'Type', 'Value': 'Type::Int'}]
+        }
+        output = handle_param_typing(input_parameter)
+        self.assertEqual(output, expected_output)
+
+    def test_handle_param_typing_flat_parameter(self):
+        """handle_param_typing() should return flat parameters without type strings as is."""
+        input_parameter = {
+            'Bucket': 'my-bucket',
+            'Key': 'my-key'
+        }
+        output = handle_param_typing(input_parameter)
+        self.assertIs(output, input_parameter)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,258 @@
+import json
+import threading
+import unittest
+from http.client import RemoteDisconnected
+from urllib.error import HTTPError
+from unittest.mock import MagicMock, Mock, patch
+from botohook.lambda_function import lambda_handler
+
+
+EVENT = {
+    'ResponseURL': 'https://cloudformation-custom-resource-response.s3.amazonaws.com/response',
+    'StackId': 'arn:aws:cloudformation:us-east-1:123456789012:stack/my-stack/guid',
+    'RequestId': 'my-request-id',
+    'ResourceType': 'Custom::Botohook',
+    'LogicalResourceId': 'MyResource'
+}
+
+
+def get_context(remaining_time_in_millis=30000):
+    context = Mock()
+    context.get_remaining_time_in_millis.return_value = remaining_time_in_millis
+    return context
+
+
+def get_responses(urlopen):
+    return [json.loads(call.args[0].data) for call in urlopen.call_args_list]
+
+
+@patch('botohook.lambda_function.time.sleep')
+@patch('botohook.lambda_function.urlopen', new_callable=MagicMock)
+@patch('botohook.lambda_function._get_client')
+class TestBotohookLambdaHandler(unittest.TestCase):
+    def test_lambda_handler_successful_request(self, get_client, urlopen, _):
+        """lambda_handler() should PUT a SUCCESS response with the flattened Boto3 response as data."""
+        get_client.return_value.create_bucket.return_value = {'Location': '/my-bucket'}
+        event = {
+            **EVENT,
+            'RequestType': 'Create',
+            'ResourceProperties': {
+                'Create': {
+                    'Client': 's3',
+                    'Method': 'create_bucket',
+                    'Parameters': {'Bucket': 'my-bucket'},
+                    'PhysicalResourceId': 'Location'
+                }
+            }
+        }
+        lambda_handler(event, get_context())
+
+        get_client.assert_called_once_with('s3')
+        get_client.return_value.create_bucket.assert_called_once_with(Bucket='my-bucket')
+        request = urlopen.call_args.args[0]
+        self.assertEqual(request.full_url, EVENT['ResponseURL'])
+        self.assertEqual(request.get_method(), 'PUT')
+        self.assertEqual(request.get_header('Content-type'), '')
+        self.assertEqual(get_responses(urlopen), [{
+            'Status': 'SUCCESS',
+            'Reason': '',
+            'PhysicalResourceId': '/my-bucket',
+            'StackId': EVENT['StackId'],
+            'RequestId': EVENT['RequestId'],
+            'LogicalResourceId': EVENT['LogicalResourceId'],
+            'NoEcho': False,
+            'Data': {'Location': '/my-bucket', 'Ref': '/my-bucket'}
+        }])
+
+    def test_lambda_handler_failed_request(self, get_client, urlopen, _):
+        """lambda_handler() should PUT a FAILED response with the error as reason if the Boto3 method fails."""
+        get_client.return_value.delete_bucket.side_effect = Exception('The bucket you tried to delete is not empty')
+        event = {
+            **EVENT,
+            'RequestType': 'Delete',
+            'PhysicalResourceId': 'my-bucket',
+            'ResourceProperties': {
+                'Delete': {
+                    'Client': 's3',
+                    'Method': 'delete_bucket',
+                    'Parameters': {'Bucket': 'my-bucket'}
+                }
+            }
+        }
+        lambda_handler(event, get_context())
+
+        self.assertEqual(get_responses(urlopen), [{
+            'Status': 'FAILED',
+            'Reason': 'The bucket you tried to delete is not empty',
+            'PhysicalResourceId': 'my-bucket',
+            'StackId': EVENT['StackId'],
+            'RequestId': EVENT['RequestId'],
+            'LogicalResourceId': EVENT['LogicalResourceId'],
+            'NoEcho': False,
+            'Data': {}
+        }])
+
+    def test_lambda_handler_unsupported_request_type(self, get_client, urlopen, _):
+        """lambda_handler() should PUT a FAILED response for request types other than Create, Update and Delete."""
+        event = {
+            **EVENT,
+            'RequestType': 'Invalid',
+            'ResourceProperties': {
+                'Invalid': {'Client': 's3', 'Method': 'create_bucket'}
+            }
+        }
+        lambda_handler(event, get_context())
+
+        get_client.assert_not_called()
+        response, = get_responses(urlopen)
+        self.assertEqual(response['Status'], 'FAILED')
+        self.assertEqual(response['Reason'], 'Unsupported request type \'Invalid\'.')
+
+    def test_lambda_handler_reused_physical_id(self, get_client, urlopen, _):
+        """lambda_handler() should reuse the event physical resource ID if the handler does not return any."""
+        event = {
+            **EVENT,
+            'RequestType': 'Delete',
+            'PhysicalResourceId': 'my-physical-id',
+            'ResourceProperties': {}
+        }
+        lambda_handler(event, get_context())
+
+        get_client.assert_not_called()
+        response, = get_responses(urlopen)
+        self.assertEqual(response['Status'], 'SUCCESS')
+        self.assertEqual(response['PhysicalResourceId'], 'my-physical-id')
+
+    def test_lambda_handler_generated_physical_id(self, get_client, urlopen, _):
+        """lambda_handler() should generate a physical resource ID if neither the event nor the handler has any."""
+        get_client.return_value.put_object.return_value = {'ETag': 'my-etag'}
+        event = {
+            **EVENT,
+            'RequestType': 'Create',
+            'ResourceProperties': {
+                'Create': {'Client': 's3', 'Method': 'put_object'}
+            }
+        }
+        lambda_handler(event, get_context())
+
+        response, = get_responses(urlopen)
+        self.assertEqual(response['Status'], 'SUCCESS')
+        self.assertRegex(response['PhysicalResourceId'], r'^my-stack_MyResource_[A-Z0-9]{8}$')
+
+    def test_lambda_handler_truncated_reason(self, get_client, urlopen, _):
+        """lambda_handler() should truncate reasons longer than 256 characters, keeping their end."""
+        get_client.return_value.create_bucket.side_effect = Exception('a' * 300 + 'end')
+        event = {
+            **EVENT,
+            'RequestType': 'Create',
+            'ResourceProperties': {
+                'Create': {'Client': 's3', 'Method': 'create_bucket'}
+            }
+        }
+        lambda_handler(event, get_context())
+
+        response, = get_responses(urlopen)
+        self.assertEqual(response['Status'], 'FAILED')
+        self.assertEqual(response['Reason'], 'ERROR: (truncated) ' + 'a' * 237 + 'end')
+
+    def test_lambda_handler_transport_error(self, _, urlopen, sleep):
+        """lambda_handler() should retry sending the response, and not raise if it cannot be sent."""
+        urlopen.side_effect = RemoteDisconnected('Remote end closed connection without response')
+        event = {
+            **EVENT,
+            'RequestType': 'Delete',
+            'PhysicalResourceId': 'my-physical-id',
+            'ResourceProperties': {}
+        }
+        lambda_handler(event, get_context())
+
+        self.assertEqual(urlopen.call_count, 5)
+        self.assertEqual(sleep.call_count, 4)
+
+    def test_lambda_handler_http_error(self, _, urlopen, sleep):
+        """lambda_handler() should not retry sending the response if CloudFormation answers with an error status."""
+        urlopen.side_effect = HTTPError(EVENT['ResponseURL'], 403, 'Forbidden', {}, None)
+        event = {
+            **EVENT,
+            'RequestType': 'Delete',
+            'PhysicalResourceId': 'my-physical-id',
+            'ResourceProperties': {}
+        }
+        lambda_handler(event, get_context())
+
+        self.assertEqual(urlopen.call_count, 1)
+        sleep.assert_not_called()
+
+    def test_lambda_handler_transport_error_deadline(self, _, urlopen, sleep):
+        """lambda_handler() should bound its attempts to send the response by the function remaining time."""
+        urlopen.side_effect = RemoteDisconnected('Remote end closed connection without response')
+        event = {
+            **EVENT,
+            'RequestType': 'Delete',
+            'PhysicalResourceId': 'my-physical-id',
+            'ResourceProperties': {}
+        }
+        # Let the patched time.sleep advance a fake monotonic clock.
+        clock = [0.0]
+        sleep.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+        with patch('botohook.lambda_function.time.monotonic', side_effect=lambda: clock[0]):
+            lambda_handler(event, get_context(remaining_time_in_millis=3000))
+
+        for call in urlopen.call_args_list:
+            self.assertLessEqual(call.kwargs['timeout'], 3)
+        self.assertLess(clock[0], 3)
+
+    def test_lambda_handler_orjson_fallback(self, get_client, urlopen, _):
+        """lambda_handler() should fall back to json if orjson cannot serialize the response."""
+        get_client.return_value.get_item.return_value = {'Count': 2 ** 70}
+        event = {
+            **EVENT,
+            'RequestType': 'Create',
+            'ResourceProperties': {
+                'Create': {'Client': 'dynamodb', 'Method': 'get_item'}
+            }
+        }
+        lambda_handler(event, get_context())
+
+        response, = get_responses(urlopen)
+        self.assertEqual(response['Status'], 'SUCCESS')
+        self.assertEqual(response['Data'], {'Count': 2 ** 70})
+
+    def test_lambda_handler_unserializable_response(self, get_client, urlopen, _):
+        """lambda_handler() should PUT a FAILED response if the Boto3 response cannot be serialized."""
+        get_client.return_value.get_object.return_value = {'Body': object()}
+        event = {
+            **EVENT,
+            'RequestType': 'Create',
+            'ResourceProperties': {
+                'Create': {'Client': 's3', 'Method': 'get_object'}
+            }
+        }
+        lambda_handler(event, get_context())
+
+        response, = get_responses(urlopen)
+        self.assertEqual(response['Status'], 'FAILED')
+        self.assertTrue(response['Reason'].startswith('Failed to serialize the response'))
+        self.assertEqual(response['Data'], {})
+
+    def test_lambda_handler_timeout(self, get_client, urlopen, _):
+        """lambda_handler() should PUT a FAILED response if the function is about to time out."""
+        sent = threading.Event()
+        urlopen.side_effect = lambda *_, **__: sent.set() or MagicMock()
+        get_client.return_value.create_bucket.side_effect = lambda **_: sent.wait(5) and {}
+        event = {
+            **EVENT,
+            'RequestType': 'Create',
+            'ResourceProperties': {
+                'Create': {'Client': 's3', 'Method': 'create_bucket'}
+            }
+        }
+        lambda_handler(event, get_context(remaining_time_in_millis=600))
+
+        response = get_responses(urlopen)[0]
+        self.assertEqual(response['Status'], 'FAILED')
+        self.assertEqual(response['Reason'], 'Execution timed out')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,14 @@
 import unittest
 import os
 from unittest.mock import patch
-from transform.lambda_function import replace_fragment_resources
+from transform.lambda_function import _load_config, replace_fragment_resources
 
 
 class TestTransformReplaceFragmentResources(unittest.TestCase):
+    def setUp(self):
+        # The configuration is cached for the lifetime of the execution environment, but each test patches its own.
+        _load_config.cache_clear()
+
     @patch.dict(os.environ, {
         'RESOURCE_TYPE_PREFIX': 'MyCustom::',
         'RESOURCE_TYPE_SERVICE_TOKENS': '{"TypeA": "arn:aws:lambda:us-east-1:123456789012:function:my-function-a"}'
@@ -54,6 +58,60 @@ class TestTransformReplaceFragmentResources(unittest.TestCase):
         output = replace_fragment_resources(input_resources)
         self.assertEqual(output, expected_output)
 
+    @patch.dict(os.environ, {
+        'RESOURCE_TYPE_PREFIX': 'MyCustom::',
+        'RESOURCE_TYPE_SERVICE_TOKENS': '{"TypeA": "arn:aws:lambda:us-east-1:123456789012:function:my-function-a"}'
+    })
+    @patch('json.loads', return_value={
+        'TypeA': 'arn:aws:lambda:us-east-1:123456789012:function:my-function-a'
+    })
+    def test_replace_fragment_resources_missing_properties(self, _):
+        """replace_fragment_resources() should replace custom resources that do not have any Properties."""
+        input_resources = {
+            'MyCustom::TypeA': {
+                'Type': 'MyCustom::TypeA'
+            }
+        }
+        expected_output = {
+            'MyCustom::TypeA': {
+                'Type': 'AWS::CloudFormation::CustomResource',
+                'Properties': {
+                    'ServiceToken': 'arn:aws:lambda:us-east-1:123456789012:function:my-function-a'
+                }
+            }
+        }
+        output = replace_fragment_resources(input_resources)
+        self.assertEqual(output, expected_output)
+
+    @patch.dict(os.environ, {
+        'RESOURCE_TYPE_PREFIX': 'MyCustom::',
+        'RESOURCE_TYPE_SERVICE_TOKENS': '{"Custom": "arn:aws:lambda:us-east-1:123456789012:function:my-function-c"}'
+    })
+    @patch('json.loads', return_value={
+        'Custom': 'arn:aws:lambda:us-east-1:123456789012:function:my-function-c'
+    })
+    def test_replace_fragment_resources_prefix_removal(self, _):
+        """replace_fragment_resources() should only remove the prefix from the resource type, not its characters."""
+        input_resources = {
+            'MyCustom::Custom': {
+                'Type': 'MyCustom::Custom',
+                'Properties': {
+                    'Property1': 'Value1'
+                }
+            }
+        }
+        expected_output = {
+            'MyCustom::Custom': {
+                'Type': 'AWS::CloudFormation::CustomResource',
+                'Properties': {
+                    'ServiceToken': 'arn:aws:lambda:us-east-1:123456789012:function:my-function-c',
+                    'Property1': 'Value1'
+                }
+            }
+        }
+        output = replace_fragment_resources(input_resources)
+        self.assertEqual(output, expected_output)
+
     @patch.dict(os.environ, {
         'RESOURCE_TYPE_PREFIX': 'MyCustom::',
         'RESOURCE_TYPE_SERVICE_TOKENS': '{}'
@@ -82,6 +140,23 @@ class TestTransformReplaceFragmentResources(unittest.TestCase):
         output = replace_fragment_resources(input_resources)
         self.assertEqual(output, expected_output)
 
+    @patch.dict(os.environ, {
+        'RESOURCE_TYPE_PREFIX': 'MyCustom::',
+        'RESOURCE_TYPE_SERVICE_TOKENS': '{"TypeA": "arn:aws:lambda:us-east-1:123456789012:function:my-function-a"}'
+    })
+    @patch('json.loads', return_value={
+        'TypeA': 'arn:aws:lambda:us-east-1:123456789012:function:my-function-a'
+    })
+    def test_replace_fragment_resources_no_custom_resource(self, _):
+        """replace_fragment_resources() should return the resources as is if none of them is a custom resource."""
+        input_resources = {
+            'AWS::S3::Bucket': {
+                'Type': 'AWS::S3::Bucket'
+            }
+        }
+        output = replace_fragment_resources(input_resources)
+        self.assertIs(output, input_resources)
+
 
 if __name__ == '__main__':
     unittest.main()
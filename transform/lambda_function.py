@@ -13,9 +13,65 @@ The module defines two functions:
       given prefix with an AWS CloudFormation Custom Resource pointing to the ServiceToken corresponding to the
       resource.
 """
+from functools import lru_cache
 import json
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Tuple
+
+
+@lru_cache(maxsize=None)
+def _load_config() -> Tuple[str, Dict[str, str]]:
+    """
+    Load the function configuration from its environment variables, on first use only.
+
+    The configuration does not change for the lifetime of the execution environment, thus is read and parsed once
+    rather than on every invocation.
+
+    :return: A tuple containing the resource type prefix, and a dictionary mapping resource types (without prefix) to
+             their service token.
+
+    :rtype: Tuple[str, Dict[str, str]]
+    """
+    return os.environ['RESOURCE_TYPE_PREFIX'], json.loads(os.environ['RESOURCE_TYPE_SERVICE_TOKENS'])
+
+
+def _transform_iter(resources: Dict[str, Any], resource_type_prefix: str,
+                    resource_type_service_tokens: Dict[str, str]) -> Iterator[Tuple[str, Any]]:
+    """
+    Iterate over the resources of a CloudFormation template, replacing custom resources on the fly.
+
+    Resources that are not replaced are yielded as is, and replaced ones are shallow copies of the original definition.
+
+    :param resources: A dictionary representing the Resources section of a CloudFormation template fragment.
+
+    :type resources: dict
+
+    :param resource_type_prefix: The Type prefix of the resources to replace.
+
+    :type resource_type_prefix: str
+
+    :param resource_type_service_tokens: A dictionary mapping resource types (without prefix) to their service token.
+
+    :type resource_type_service_tokens: dict
+
+    :return: An iterator over the (resource ID, resource definition) pairs of the transformed Resources section.
+
+    :rtype: Iterator[Tuple[str, Any]]
+    """
+    for resource_id, resource_def in resources.items():
+        resource_type = resource_def.get('Type')
+
+        if (resource_type and resource_type.startswith(resource_type_prefix)
+                and (custom_type := resource_type.removeprefix(resource_type_prefix)) in resource_type_service_tokens):
+            # Shallow-copy the resource definition and its properties once, rather than merging them in new dicts.
+            properties = {'ServiceToken': resource_type_service_tokens[custom_type]}
+            properties.update(resource_def.get('Properties') or {})
+
+            resource_def = resource_def.copy()
+            resource_def['Type'] = 'AWS::CloudFormation::CustomResource'
+            resource_def['Properties'] = properties
+
+        yield resource_id, resource_def
 
 
 def replace_fragment_resources(resources: Dict[str, Any]) -> Dict[str, Any]:
@@ -35,21 +91,15 @@ def replace_fragment_resources(resources: Dict[str, Any]) -> Dict[str, Any]:
 
     :rtype: dict
     """
-    RESOURCE_TYPE_PREFIX: str = os.environ['RESOURCE_TYPE_PREFIX']
-    RESOURCE_TYPE_SERVICE_TOKENS: Dict[str, str] = json.loads(os.environ['RESOURCE_TYPE_SERVICE_TOKENS'])
-
-    return {
-        resource_id: {
-            **resource_def,
-            'Type': 'AWS::CloudFormation::CustomResource',
-            'Properties': {
-                'ServiceToken': RESOURCE_TYPE_SERVICE_TOKENS[resource_def['Type'].lstrip(RESOURCE_TYPE_PREFIX)],
-                **resource_def.get('Properties')
-            }
-        } if 'Type' in resource_def and resource_def['Type'].startswith(RESOURCE_TYPE_PREFIX)
-        and resource_def['Type'].lstrip(RESOURCE_TYPE_PREFIX) in RESOURCE_TYPE_SERVICE_TOKENS
-        else resource_def for resource_id, resource_def in resources.items()
-    }
+    RESOURCE_TYPE_PREFIX, RESOURCE_TYPE_SERVICE_TOKENS = _load_config()
+
+    # Most resources are not custom ones: return the Resources section as is if there is nothing to replace.
+    if not RESOURCE_TYPE_SERVICE_TOKENS or not any(
+        (resource_def.get('Type') or '').startswith(RESOURCE_TYPE_PREFIX) for resource_def in resources.values()
+    ):
+        return resources
+
+    return dict(_transform_iter(resources, RESOURCE_TYPE_PREFIX, RESOURCE_TYPE_SERVICE_TOKENS))
 
 
 def lambda_handler(event, _):
@@ -84,13 +134,13 @@ def lambda_handler(event, _):
     :rtype: dict
     """
     try:
+        fragment: Dict[str, Any] = event['fragment'].copy()
+        fragment['Resources'] = replace_fragment_resources(fragment['Resources'])
+
         return {
             'requestId': event['requestId'],
             'status': 'success',
-            'fragment': {
-                **event['fragment'],
-                'Resources': replace_fragment_resources(event['fragment']['Resources'])
-            }
+            'fragment': fragment
         }
 
     except Exception as err: